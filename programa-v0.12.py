@@ -12,12 +12,29 @@
 # 8) salir
 # Los datos se guardan en un archivo CSV llamado "inventario.csv"
 # con las columnas: codigo, nombre, precio, stock
+# Los precios se manejan en centavos enteros y se escriben como "12.50".
+# Cada cambio se anota primero en "inventario.journal" y el CSV completo
+# se reescribe solo al salir o cada cierto número de cambios.
 # ==============================
 
 import os
+import io
+import sys
 import csv
-from typing import List, Dict, Optional 
-import time
+import heapq
+import math
+import operator
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from itertools import count
+
+# numpy es opcional: si está instalado, el reporte de inventarios grandes
+# se calcula con operaciones vectoriales; si no, con Python puro
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Nombre del archivo CSV que guarda el inventario
 ARCHIVO_CSV = "inventario.csv"
@@ -25,6 +42,64 @@ ARCHIVO_CSV = "inventario.csv"
 # Columnas que usará el CSV (encabezados)
 CAMPOS = ["codigo", "nombre", "precio", "stock","vendidos"]
 
+# Líneas separadoras de las tablas (se arman una sola vez)
+SEPARADOR = "-" * 60
+SEPARADOR_ANCHO = "-" * 80
+
+# Encabezado de las tablas de un producto (buscar / editar)
+ENCABEZADO_PRODUCTO = f"{'CÓDIGO':<10} {'NOMBRE':<20} {'PRECIO':<10} {'STOCK':<10}"
+
+# Parte fija del aviso de decidir_continuar
+AVISO_VOLVER = f"\n{SEPARADOR}\nPresiona [Enter] para volver al menú\n"
+
+# Desde cuántos productos el reporte usa numpy (si está instalado)
+MINIMO_PARA_NUMPY = 1000
+
+# Tamaño del buffer para leer / escribir el CSV (1 MiB): menos llamadas
+# al sistema operativo cuando el archivo es grande
+TAMANO_BUFFER = 1 << 20
+
+# Tabla para limpiar el precio en una sola pasada: quita "$" y espacios
+TABLA_PRECIO = str.maketrans("", "", "$ ")
+
+# Archivo donde se anotan los cambios pendientes (una línea por cambio)
+ARCHIVO_JOURNAL = "inventario.journal"
+
+# Cada cuántos cambios se reescribe el CSV completo y se vacía el journal
+OPERACIONES_POR_COMPACTACION = 50
+
+# Cambios anotados en el journal desde la última compactación
+_operaciones_pendientes = 0
+
+# True si el CSV trae códigos repetidos: reescribirlo perdería filas, así que
+# no se guarda ni se compacta (los cambios quedan en el journal)
+_guardado_bloqueado = False
+
+# Índice de búsqueda por nombre: trigrama -> códigos cuyo nombre lo contiene
+_indice_trigramas = defaultdict(set)
+
+# Índice de búsqueda por código: código en minúsculas -> códigos
+_indice_codigos = defaultdict(set)
+
+# Numera los productos en el orden en que entran al inventario, para
+# mostrar los resultados de una búsqueda en el orden del inventario
+_orden_productos = count()
+
+# Versión del inventario en memoria: aumenta con cada cambio
+_version_inventario = 0
+
+# Tabla de mostrar_inventario ya formateada y la versión a la que corresponde
+_tabla_cache = None
+_tabla_cache_version = -1
+
+# Inventario por columnas (ver columnas_inventario) y su versión
+_columnas_cache = None
+_columnas_cache_version = -1
+
+# Último inventario cargado y la firma (fechas de modificación) del CSV y
+# del journal de la que salió; ver cargar_inventario
+_cache_carga = {"firma": None, "inventario": None}
+
 # ------------------------------
 # MENÚ PRINCIPAL
 # ------------------------------
@@ -49,7 +124,7 @@ def main():
     - Muestra el menú en un bucle (while).
     - Ejecuta la opción seleccionada por el usuario.
     """
-    inventario = cargar_inventario()  # Cargamos productos desde el CSV (lista de diccionarios)
+    inventario = cargar_inventario()  # Cargamos productos desde el CSV (diccionario codigo -> producto)
 
     menu_abierto = True
     while menu_abierto:
@@ -58,22 +133,15 @@ def main():
         opcion = input("Introduce la opción:")
         
         # Identificamos qué función vamos a ejecutar
-        funcion_actual = None
-        
-        match opcion:
-            case '1': funcion_actual = mostrar_inventario
-            case '2': funcion_actual = buscar_producto
-            case '3': funcion_actual = agregar_producto
-            case '4': funcion_actual = editar_producto
-            case '5': funcion_actual = eliminar_producto
-            case '6': funcion_actual = registrar_venta
-            case '7': funcion_actual = generar_reporte
-            case '8': 
-                print('Salir')
-                menu_abierto = False
-            case _:
-                print("Opción inválida")
-                input("Enter para continuar")
+        funcion_actual = OPCIONES_MENU.get(opcion)
+
+        if opcion == '8':
+            print('Salir')
+            compactar_inventario(inventario)
+            menu_abierto = False
+        elif funcion_actual is None:
+            print("Opción inválida")
+            input("Enter para continuar")
 
         # 2. Si se seleccionó una función válida, entramos al ciclo de "Reintento"
         if funcion_actual:
@@ -87,159 +155,592 @@ def main():
 # ------------------------------
 # LECTURA Y ESCRITURA DEL CSV
 # ------------------------------
+def firma_archivos():
+    """
+    Retorna la fecha de modificación (en ns), el tamaño y el inodo del CSV
+    y del journal. Un archivo que no existe aparece como None.
+    El tamaño y el inodo detectan cambios que caen en el mismo instante
+    en sistemas de archivos con fechas poco precisas (un reemplazo del
+    CSV cambia el inodo; una línea nueva en el journal, el tamaño).
+    """
+    firma = []
+    for ruta in (ARCHIVO_CSV, ARCHIVO_JOURNAL):
+        try:
+            info = os.stat(ruta)
+            firma.append((info.st_mtime_ns, info.st_size, info.st_ino))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
 def cargar_inventario():
+    """
+    Retorna el inventario. Si el CSV y el journal no cambiaron desde la
+    última carga (misma firma_archivos), reutiliza el inventario en memoria
+    en vez de volver a leerlos.
+
+    Los cambios no actualizan la firma (así no se consulta el disco en cada
+    cambio): después de un cambio, la siguiente carga vuelve a leer los
+    archivos, que ya tienen lo mismo que la memoria.
+    """
+    firma = firma_archivos()
+    if _cache_carga["inventario"] is not None and _cache_carga["firma"] == firma:
+        return _cache_carga["inventario"]
+
+    inventario = leer_inventario()
+    _cache_carga["firma"] = firma
+    _cache_carga["inventario"] = inventario
+    return inventario
+
+def leer_inventario():
     """
     Lee el archivo CSV y carga los productos en memoria.
-    Retorna una lista de diccionarios:
-    [
-      {"codigo": "...", "nombre": "...", "precio": 0.0, "stock": 0},
+    Retorna un diccionario indexado por código (mantiene el orden del CSV):
+    {
+      "10001": {"codigo": "10001", "nombre": "...", "precio_centavos": 0, "stock": 0},
       ...
-    ]
+    }
+
+    Indexar por código hace que buscar, editar o eliminar un producto
+    sea una consulta directa O(1) en vez de recorrer toda la lista.
 
     Detalles importantes:
-    - Si el archivo no existe, lo crea con encabezados y devuelve lista vacía.
+    - Si el archivo no existe, parte con el inventario vacío. El CSV se crea
+      en el primer guardado (guardar_inventario siempre escribe el encabezado).
+    - Luego aplica los cambios pendientes del journal (ver reproducir_journal).
     - Usa encoding 'utf-8-sig' para manejar BOM (Excel a veces lo agrega).
     - Usa delimiter ';' porque Excel en Chile suele exportar con punto y coma.
+    - El encabezado se normaliza una sola vez y las filas se leen como listas
+      (sin armar ni renombrar un diccionario intermedio por cada fila).
+    - El archivo se lee completo de una vez y se convierte por columnas.
+    - Si hay códigos repetidos se bloquea el guardado (ver _guardado_bloqueado).
     """
-    inventario = []
+    global _version_inventario, _guardado_bloqueado
+
+    # Es un inventario nuevo: las tablas y columnas guardadas ya no sirven
+    _version_inventario += 1
+    _guardado_bloqueado = False
+    inventario = {}
 
-    # Si el CSV no existe, se crea con encabezados
+    # Si el CSV no existe, solo quedan los cambios del journal (si hay)
     if not os.path.exists(ARCHIVO_CSV):
-        with open(ARCHIVO_CSV, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=CAMPOS)
-            writer.writeheader()
+        reproducir_journal(inventario)
+        indexar_inventario(inventario)
         return inventario
 
     # Abrimos el CSV con utf-8-sig para quitar BOM automáticamente
-    with open(ARCHIVO_CSV, "r", newline="", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f, delimiter=";")
+    # y leemos el archivo completo con una sola lectura
+    with open(ARCHIVO_CSV, "r", newline="", encoding="utf-8-sig", buffering=TAMANO_BUFFER) as f:
+        contenido = f.read()
+
+    reader = csv.reader(io.StringIO(contenido, newline=""), delimiter=";")
+
+    # Normalizamos el encabezado una sola vez: "Codigo " -> "codigo"
+    encabezado = [c.strip().lower() for c in next(reader, [])]
+
+    # Tomamos todas las filas de una vez (saltando las vacías)
+    filas = [fila for fila in reader if fila]
+
+    # Posición de cada columna. Si el CSV no trae alguna (p.ej. "vendidos"),
+    # queda en None y esa columna se lee como celdas vacías.
+    largo = len(encabezado)
+    posiciones = [encabezado.index(c) if c in encabezado else None for c in CAMPOS]
+
+    # Filas incompletas: rellenamos con celdas vacías
+    if filas and min(map(len, filas)) < largo:
+        for fila in filas:
+            if len(fila) < largo:
+                fila.extend([""] * (largo - len(fila)))
+
+    # Pasamos de filas a columnas y convertimos cada columna completa
+    columnas = list(zip(*filas)) or [()] * largo
+    vacia = ("",) * len(filas)
+    col_cod, col_nom, col_pre, col_stk, col_ven = (
+        vacia if i is None else columnas[i] for i in posiciones
+    )
+
+    precios = convertir_columna(col_pre, float, convertir_precio)
+    centavos = list(map(a_centavos, precios))
+    stocks = convertir_columna(col_stk, int, convertir_entero)
+    vendidos = convertir_columna(col_ven, int, convertir_entero)
+
+    for codigo, nombre, precio, stock, vend in zip(
+        col_cod, col_nom, centavos, stocks, vendidos
+    ):
+        inventario[codigo] = {
+            "codigo": codigo,
+            "nombre": nombre,
+            "precio_centavos": precio,
+            "stock": stock,
+            "vendidos": vend
+        }
 
-        for row in reader:
-            # Normalizamos claves: "Codigo" -> "codigo" (minúscula) y sin espacios
-            row = {k.strip().lower(): v for k, v in row.items() if k}
+    # Códigos repetidos: en el diccionario solo queda la última fila de cada
+    # uno y las demás se perderían al guardar, así que se bloquea el guardado
+    if len(inventario) < len(filas):
+        _guardado_bloqueado = True
+        avisar_codigos_repetidos(col_cod, "codigo" in encabezado)
 
-            # Convertimos precio a float
-            try:
-                precio_raw = str(row.get("precio", "")).strip().replace("$", "").replace(" ", "")
-                if "," in precio_raw and "." not in precio_raw:
-                    precio_raw = precio_raw.replace(",", ".")
-                elif "." in precio_raw and "," in precio_raw:
-                    precio_raw = precio_raw.replace(".", "").replace(",", ".")
+    reproducir_journal(inventario)
+    indexar_inventario(inventario)
+    return inventario
 
-                row["precio"] = float(precio_raw) if precio_raw else 0.0
-            except ValueError:
-                row["precio"] = 0.0
+def avisar_codigos_repetidos(codigos, hay_columna_codigo):
+    """
+    Avisa que el CSV trae filas con el mismo código. El inventario guarda
+    un producto por código, así que de cada código repetido se muestra
+    la última fila, y el CSV no se reescribe hasta que se corrija.
+    """
+    if not hay_columna_codigo:
+        print("AVISO: el CSV no tiene columna 'codigo'; solo se cargó la última fila.")
+    else:
+        vistos = set()
+        repetidos = []
+        for codigo in codigos:
+            if codigo in vistos and codigo not in repetidos:
+                repetidos.append(codigo)
+            vistos.add(codigo)
 
-            # Convertimos stock a int
-            try:
-                row["stock"] = int(row.get("stock", 0))
-            except ValueError:
-                row["stock"] = 0
+        print(f"AVISO: códigos repetidos en el CSV: {', '.join(repr(c) for c in repetidos)}")
+        print("       Se cargó la última fila de cada uno.")
 
-            try:
-                row["vendidos"] = int(row.get("vendidos",0))
-            except ValueError:
-                row["vendidos"] = 0
-            # Aseguramos que exista "codigo"
-            if "codigo" not in row:
-                row["codigo"] = ""
+    print(f"       {ARCHIVO_CSV} no se modificará: los cambios quedan en {ARCHIVO_JOURNAL}.")
+    print("       Corrige el archivo y vuelve a abrir el programa.")
 
-            inventario.append(row)
+@lru_cache(maxsize=4096)
+def convertir_precio(texto):
+    """
+    Convierte un precio del CSV a float. Acepta "$1.234,5", "12,5" o "12.5".
+    Si el valor no es válido retorna 0.0.
 
-    return inventario
+    Se memoriza: en un catálogo los mismos precios se repiten mucho, y un
+    precio ya visto se resuelve sin volver a limpiar el texto.
+    """
+    precio_raw = texto.translate(TABLA_PRECIO)
+    if not precio_raw:
+        return 0.0
+
+    # "12,5" -> "12.5"  |  "1.234,5" -> "1234.5"  |  "12.5" queda igual
+    if "," in precio_raw:
+        if "." in precio_raw:
+            precio_raw = precio_raw.replace(".", "")
+        precio_raw = precio_raw.replace(",", ".")
+
+    try:
+        return float(precio_raw)
+    except ValueError:
+        return 0.0
+
+def a_centavos(precio):
+    """
+    Convierte un precio (float) a centavos enteros: 12.5 -> 1250.
+    Con centavos las sumas son exactas y guardar / mostrar es aritmética entera.
+    Si el valor no es un número finito retorna 0.
+    """
+    try:
+        return round(precio * 100)
+    except (ValueError, OverflowError):
+        return 0
+
+def convertir_precio_ingresado(texto):
+    """
+    Convierte un precio escrito por el usuario ("12,5" o "12.5") a centavos.
+    A diferencia de la carga del CSV, un valor que no es un número finito
+    ("nan", "inf", "1e400") no pasa a 0: lanza ValueError para pedirlo otra vez.
+    """
+    precio = float(texto.strip().replace(",", "."))
+    if not math.isfinite(precio):
+        raise ValueError
+    return a_centavos(precio)
+
+def formatear_precio(centavos):
+    """
+    Formatea centavos como precio con dos decimales: 1250 -> "12.50".
+    Se usa el punto para que al cargar el CSV la columna pase directo por float().
+    """
+    signo = "-" if centavos < 0 else ""
+    centavos = abs(centavos)
+    return f"{signo}{centavos // 100}.{centavos % 100:02d}"
+
+def convertir_entero(texto):
+    """Convierte stock / vendidos a int. Si el valor no es válido retorna 0."""
+    try:
+        return int(texto)
+    except ValueError:
+        return 0
+
+def convertir_columna(columna, convertir_rapido, convertir_celda):
+    """
+    Convierte una columna completa del CSV.
+    Primero intenta map() con el conversor nativo (float / int), que recorre
+    toda la columna en C. Si algún valor no sirve (p.ej. "$1.234,5" o ""),
+    vuelve a convertir celda por celda con convertir_celda.
+    """
+    try:
+        return list(map(convertir_rapido, columna))
+    except ValueError:
+        return list(map(convertir_celda, columna))
 
 def guardar_inventario(inventario):
     """
-    Guarda la lista de productos en el CSV.
+    Guarda los productos en el CSV.
     Retorna True si guardó bien, False si hubo error.
 
     Se guarda con:
     - encoding 'utf-8-sig' (compatible con Excel)
     - delimiter ';'
+    - todas las filas en una sola llamada a writerows (el ciclo corre en C)
+    - primero en un archivo temporal que luego reemplaza al CSV (os.replace),
+      así un corte a mitad de escritura nunca deja el CSV a medias.
+      Si algo falla, el temporal se borra y el CSV anterior sigue igual.
+    - sin os.fsync: el reemplazo atómico ya protege el archivo y forzar
+      el disco en cada guardado lo haría mucho más lento.
     """
+    if _guardado_bloqueado:
+        print(f"ERROR al guardar: {ARCHIVO_CSV} tiene códigos repetidos; corrígelo primero.")
+        return False
+
+    temporal = ARCHIVO_CSV + ".tmp"
+    formatear = formatear_precio
     try:
-        with open(ARCHIVO_CSV, "w", newline="", encoding="utf-8-sig") as f:
-            writer = csv.DictWriter(f, fieldnames=CAMPOS, delimiter=";")
-            writer.writeheader()
-
-            for p in inventario:
-                writer.writerow({
-                    "codigo": p["codigo"],
-                    "nombre": p["nombre"],
-                    "precio": p["precio"],
-                    "stock": p["stock"],
-                    "vendidos": p.get("vendidos",0)
-                })
+        with open(temporal, "w", newline="", encoding="utf-8-sig", buffering=TAMANO_BUFFER) as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(CAMPOS)
+            writer.writerows(
+                (
+                    p["codigo"],
+                    p["nombre"],
+                    formatear(p["precio_centavos"]),
+                    p["stock"],
+                    p["vendidos"]
+                )
+                for p in inventario.values()
+            )
+        os.replace(temporal, ARCHIVO_CSV)
         return True
     except Exception as e:
         print("ERROR al guardar:", e)
+        # El CSV original queda intacto; solo borramos el temporal a medias
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
         return False
 
+# ------------------------------
+# JOURNAL DE CAMBIOS
+# ------------------------------
+def registrar_cambio(inventario, operacion, producto):
+    """
+    Anota un cambio en el journal en vez de reescribir todo el CSV.
+    Retorna True si guardó bien, False si hubo error.
+
+    Cada línea es: operacion;codigo;nombre;precio;stock;vendidos
+    - operacion: "ADD" (agregar), "EDIT" (editar / venta) o "DEL" (eliminar).
+    - Se guarda el producto completo, así reproducir la línea dos veces
+      deja el mismo resultado.
+    Cada OPERACIONES_POR_COMPACTACION cambios se compacta el inventario.
+    """
+    global _operaciones_pendientes, _version_inventario
+
+    _version_inventario += 1
+
+    try:
+        with open(ARCHIVO_JOURNAL, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow([
+                operacion,
+                producto["codigo"],
+                producto["nombre"],
+                formatear_precio(producto["precio_centavos"]),
+                producto["stock"],
+                producto["vendidos"]
+            ])
+    except Exception as e:
+        print("ERROR al guardar:", e)
+        return False
+
+    _operaciones_pendientes += 1
+    if _operaciones_pendientes >= OPERACIONES_POR_COMPACTACION:
+        return compactar_inventario(inventario)
+
+    return True
+
+def reproducir_journal(inventario):
+    """
+    Aplica sobre el inventario (recién leído del CSV) los cambios
+    anotados en el journal que aún no se han compactado.
+    Las líneas inválidas se ignoran.
+
+    Si el programa se cortó a mitad de una escritura, la última línea
+    queda sin salto de línea (p.ej. "vendidos" cortado de 12 a 1). Esa
+    línea no se aplica y se recorta del archivo, así el próximo cambio
+    se anota en una línea nueva y no pegado a la incompleta.
+    """
+    global _operaciones_pendientes
+
+    _operaciones_pendientes = 0
+    if not os.path.exists(ARCHIVO_JOURNAL):
+        return
+
+    with open(ARCHIVO_JOURNAL, "rb", buffering=TAMANO_BUFFER) as f:
+        contenido = f.read()
+
+    # Línea final incompleta: se descarta y se recorta el archivo
+    if contenido and not contenido.endswith(b"\n"):
+        contenido = contenido[:contenido.rfind(b"\n") + 1]
+        try:
+            os.truncate(ARCHIVO_JOURNAL, len(contenido))
+        except OSError as e:
+            print("ERROR al reparar el journal:", e)
+
+    texto = contenido.decode("utf-8")
+    for fila in csv.reader(io.StringIO(texto, newline=""), delimiter=";"):
+        if len(fila) != 6:
+            continue
+
+        operacion, codigo, nombre, precio, stock, vendidos = fila
+
+        if operacion == "DEL":
+            inventario.pop(codigo, None)
+        else:
+            try:
+                inventario[codigo] = {
+                    "codigo": codigo,
+                    "nombre": nombre,
+                    "precio_centavos": a_centavos(float(precio)),
+                    "stock": int(stock),
+                    "vendidos": int(vendidos)
+                }
+            except ValueError:
+                continue
+
+        _operaciones_pendientes += 1
+
+def compactar_inventario(inventario):
+    """
+    Reescribe el CSV completo una sola vez y vacía el journal.
+    Si no hay cambios pendientes no hace nada. Con el guardado bloqueado
+    tampoco: los cambios siguen a salvo en el journal.
+    Retorna True si guardó bien, False si hubo error.
+    """
+    global _operaciones_pendientes
+
+    if _operaciones_pendientes == 0 or _guardado_bloqueado:
+        return True
+
+    if not guardar_inventario(inventario):
+        return False
+
+    try:
+        os.remove(ARCHIVO_JOURNAL)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print("ERROR al vaciar el journal:", e)
+        return False
+
+    _operaciones_pendientes = 0
+    return True
+
+# ------------------------------
+# ÍNDICE DE BÚSQUEDA
+# ------------------------------
+def trigramas(texto):
+    """Retorna el conjunto de trozos de 3 caracteres seguidos de un texto."""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def indexar_producto(producto):
+    """
+    Prepara un producto para la búsqueda:
+    - Guarda su nombre y código en minúsculas (así no se repite .lower()
+      en cada búsqueda).
+    - Agrega los trigramas de su nombre y su código al índice.
+    - La primera vez le asigna su posición en el inventario (_orden).
+    """
+    producto["_nombre_lc"] = producto["nombre"].lower()
+    producto["_codigo_lc"] = producto["codigo"].lower()
+    if "_orden" not in producto:
+        producto["_orden"] = next(_orden_productos)
+
+    _indice_codigos[producto["_codigo_lc"]].add(producto["codigo"])
+    for t in trigramas(producto["_nombre_lc"]):
+        _indice_trigramas[t].add(producto["codigo"])
+
+def desindexar_producto(producto):
+    """Quita un producto del índice (antes de eliminarlo o renombrarlo)."""
+    codigos = _indice_codigos.get(producto["_codigo_lc"])
+    if codigos is not None:
+        codigos.discard(producto["codigo"])
+        if not codigos:
+            del _indice_codigos[producto["_codigo_lc"]]
+
+    for t in trigramas(producto["_nombre_lc"]):
+        codigos = _indice_trigramas.get(t)
+        if codigos is not None:
+            codigos.discard(producto["codigo"])
+            if not codigos:
+                del _indice_trigramas[t]
+
+def indexar_inventario(inventario):
+    """Reconstruye el índice de búsqueda completo."""
+    _indice_trigramas.clear()
+    _indice_codigos.clear()
+
+    for producto in inventario.values():
+        indexar_producto(producto)
+
+def columnas_inventario(inventario):
+    """
+    Retorna el inventario como columnas paralelas (una lista/arreglo por campo):
+    {
+      "codigos":  ["10001", ...],
+      "nombres":  ["Manzana", ...],
+      "precios":  array("q", [1200, ...]),    # en centavos
+      "stocks":   array("q", [5, ...]),
+      "vendidos": array("q", [5, ...]),
+    }
+    La posición i de cada columna es el mismo producto (orden del inventario).
+
+    Los números quedan en arreglos compactos, así sumar o recorrer una
+    columna no pasa por el diccionario de cada producto. Si algún valor
+    no cabe en 64 bits, esa columna queda como lista (ver columna_numerica).
+    Se reconstruye solo cuando el inventario cambió (ver _version_inventario).
+    """
+    global _columnas_cache, _columnas_cache_version
+
+    if _columnas_cache is None or _columnas_cache_version != _version_inventario:
+        productos = inventario.values()
+        _columnas_cache = {
+            "codigos": [p["codigo"] for p in productos],
+            "nombres": [p["nombre"] for p in productos],
+            "precios": columna_numerica([p["precio_centavos"] for p in productos]),
+            "stocks": columna_numerica([p["stock"] for p in productos]),
+            "vendidos": columna_numerica([p["vendidos"] for p in productos]),
+        }
+        _columnas_cache_version = _version_inventario
+
+    return _columnas_cache
+
+def columna_numerica(valores):
+    """
+    Retorna los valores como array("q") (enteros de 64 bits).
+    Los enteros de Python no tienen límite: si alguno no cabe en el
+    arreglo, se retorna la lista tal cual.
+    """
+    try:
+        return array("q", valores)
+    except OverflowError:
+        return valores
+
 # ------------------------------
 # MOSTRAR / BUSCAR
 # ------------------------------
 def mostrar_inventario(inventario):
     """
     Muestra todos los productos en formato tabla.
+
+    La tabla formateada se guarda y se reutiliza mientras el inventario
+    no cambie (ver _version_inventario), y se escribe de una sola vez.
     """
+    global _tabla_cache, _tabla_cache_version
+
     if len(inventario) == 0:
         print("No hay productos registrados.")
         return
 
-    print("\n--- Inventario ---")
-    print("\n" + "-" * 60)
-    print(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'PRECIO':<10} {'STOCK':<10} {'VENDIDOS':<10}")
-    print("-" * 60)
-
-    for producto in inventario:
-        print(
-            f"{producto['codigo']:<10} "
-            f"{producto['nombre']:<20} "
-            f"{producto['precio']:<10.2f} "
-            f"{producto['stock']:<10} "
-            f"{producto['vendidos']:<10} "
-        )
+    if _tabla_cache is None or _tabla_cache_version != _version_inventario:
+        lineas = [
+            "",
+            "--- Inventario ---",
+            "",
+            SEPARADOR,
+            f"{'CÓDIGO':<10} {'NOMBRE':<20} {'PRECIO':<10} {'STOCK':<10} {'VENDIDOS':<10}",
+            SEPARADOR,
+        ]
+
+        # Referencias locales: dentro del ciclo son más rápidas que los globales
+        agregar_linea = lineas.append
+        formatear = formatear_precio
+
+        for producto in inventario.values():
+            agregar_linea(
+                producto["codigo"].ljust(10) + " "
+                + producto["nombre"].ljust(20) + " "
+                + formatear(producto["precio_centavos"]).ljust(10) + " "
+                + str(producto["stock"]).ljust(10) + " "
+                + str(producto["vendidos"]).ljust(10) + " "
+            )
+
+        lineas.append(SEPARADOR)
+        _tabla_cache = "\n".join(lineas) + "\n"
+        _tabla_cache_version = _version_inventario
 
-    print("-" * 60)
+    sys.stdout.write(_tabla_cache)
 
     return decidir_continuar("volver a mostrar el inventario")
 
+def formatear_fila(producto):
+    """
+    Arma la fila CÓDIGO / NOMBRE / PRECIO / STOCK de una tabla.
+    Usa str.ljust en vez de f"{x:<10}": mismo resultado, sin interpretar
+    el formato en cada celda.
+    """
+    return (
+        producto["codigo"].ljust(10) + " "
+        + producto["nombre"].ljust(20) + " "
+        + formatear_precio(producto["precio_centavos"]).ljust(10) + " "
+        + str(producto["stock"]).ljust(10)
+    )
+
 def buscar_producto(inventario):
     """
     Busca productos por:
     - Código exacto
     - Parte del nombre (contiene el texto)
     Muestra resultados en una tabla.
+
+    Con 3 o más letras solo se revisan los productos que tienen todos
+    los trigramas del término o cuyo código es el término (índices), en
+    vez de todo el inventario. Los resultados van en el orden del inventario.
     """
     print("\n--- Buscar producto ---")
-    termino = input("Ingrese código o nombre del producto: ").strip().lower()
+    entrada = input("Ingrese código o nombre del producto: ").strip()
+    termino = entrada.lower()
 
     encontrados = []
 
-    for producto in inventario:
-        if (
-            termino == str(producto["codigo"]).lower()
-            or termino in producto["nombre"].lower()
-        ):
-            encontrados.append(producto)
+    if len(termino) >= 3:
+        candidatos = set.intersection(
+            *(_indice_trigramas.get(t, set()) for t in trigramas(termino))
+        )
+        candidatos |= _indice_codigos.get(termino, set())
+
+        productos = sorted(
+            (inventario[codigo] for codigo in candidatos),
+            key=operator.itemgetter("_orden"),
+        )
+        for producto in productos:
+            if termino == producto["_codigo_lc"] or termino in producto["_nombre_lc"]:
+                encontrados.append(producto)
+    else:
+        agregar = encontrados.append
+        for producto in inventario.values():
+            if termino == producto["_codigo_lc"] or termino in producto["_nombre_lc"]:
+                agregar(producto)
 
     if len(encontrados) == 0:
         print("\nNo se encontró ningún producto.\n")
         return
 
-    print("\n" + "-" * 60)
-    print(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'PRECIO':<10} {'STOCK':<10}")
-    print("-" * 60)
-
-    for producto in encontrados:
-        print(
-            f"{producto['codigo']:<10} "
-            f"{producto['nombre']:<20} "
-            f"{producto['precio']:<10} "
-            f"{producto['stock']:<10}"
-        )
-
-    print("-" * 60)
+    lineas = [
+        "",
+        SEPARADOR,
+        ENCABEZADO_PRODUCTO,
+        SEPARADOR,
+    ]
+    lineas.extend(map(formatear_fila, encontrados))
+    lineas.append(SEPARADOR)
+    sys.stdout.write("\n".join(lineas) + "\n")
 
     return decidir_continuar("volver a buscar producto")
 
@@ -251,7 +752,7 @@ def agregar_producto(inventario):
         print("\n--- Agregar producto ---")
 
         pcodigo = input("Código: ").strip()
-        if any(p["codigo"] == pcodigo for p in inventario):
+        if pcodigo in inventario:
             print("Error: ya existe un producto con ese código.")
             continue
 
@@ -259,7 +760,7 @@ def agregar_producto(inventario):
 
         while True:
             try:
-                precio = float(input("Precio: ").strip())
+                precio = convertir_precio_ingresado(input("Precio: "))
                 if precio < 0:
                     raise ValueError
                 break
@@ -278,7 +779,7 @@ def agregar_producto(inventario):
         print("\nProducto a agregar:")
         print(f"  Código : {pcodigo}")
         print(f"  Nombre : {nombre}")
-        print(f"  Precio : {precio}")
+        print(f"  Precio : {formatear_precio(precio)}")
         print(f"  Stock  : {stock}")
 
         confirmar = input("\n¿Confirmar agregado? (s/n): ").strip().lower()
@@ -297,38 +798,36 @@ def agregar_producto(inventario):
         producto = {
             "codigo": pcodigo,
             "nombre": nombre,
-            "precio": precio,
+            "precio_centavos": precio,
             "stock": stock,
             "vendidos": 0
         }
 
-        inventario.append(producto)
+        inventario[pcodigo] = producto
+        indexar_producto(producto)
 
-        if guardar_inventario(inventario):
+        if registrar_cambio(inventario, "ADD", producto):
             print("Producto agregado y guardado correctamente.")
-            time.sleep(1)
         else:
             print("Error al guardar el producto.")
-            time.sleep(1)
 
-        return False  # ← después de agregar, volver al menú
+        return decidir_continuar("agregar otro producto")
 
 
 def eliminar_producto(inventario):
     """
     Elimina un producto según su código.
-    - Si existe, lo remueve de la lista y actualiza el CSV.
+    - Si existe, lo remueve del inventario y actualiza el CSV.
     """
     print("\n--- Eliminar producto ---")
     pcodigo = input("Ingrese codigo: ").strip()
 
-    for producto in inventario:
-        if producto["codigo"] == pcodigo:
-            inventario.remove(producto)
-            guardar_inventario(inventario)
-            print("Producto eliminado del inventario")
-            time.sleep(1)
-            return decidir_continuar("volver a borrar producto")
+    producto = inventario.pop(pcodigo, None)
+    if producto is not None:
+        desindexar_producto(producto)
+        registrar_cambio(inventario, "DEL", producto)
+        print("Producto eliminado del inventario")
+        return decidir_continuar("volver a borrar producto")
 
     print("Producto no encontrado")
     return decidir_continuar("volver a borrar producto")
@@ -343,111 +842,177 @@ def editar_producto(inventario):
     print("\n--- Editar producto ---")
     pid = input("Ingrese código del producto a editar: ").strip()
 
-    for producto in inventario:
-        if producto["codigo"] == pid:
-            # Mostrar producto actual en formato tabla
-            print("\nProducto actual:")
-            print("-" * 60)
-            print(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'PRECIO':<10} {'STOCK':<10}")
-            print("-" * 60)
-            print(
-                f"{producto['codigo']:<10} "
-                f"{producto['nombre']:<20} "
-                f"{producto['precio']:<10} "
-                f"{producto['stock']:<10}"
-            )
-            print("-" * 60)
-
-            # Submenú de edición
-            print("\n¿Qué dato deseas editar?")
-            print("1. Nombre")
-            print("2. Precio")
-            print("3. Stock")
-            print("4. Cancelar")
-
-            opcion = input("Selecciona una opción (1-4): ").strip()
-
-            if opcion == "1":
-                nuevo_nombre = input("Nuevo nombre: ").strip()
-                producto["nombre"] = nuevo_nombre
-                print(f"Nombre actualizado a: {nuevo_nombre}")
-
-            elif opcion == "2":
-                try:
-                    nuevo_precio = float(input("Nuevo precio: ").strip())
-                    producto["precio"] = nuevo_precio
-                    print(f"Precio actualizado a: {nuevo_precio}")
-                except ValueError:
-                    print("Error: precio inválido.")
-
-            elif opcion == "3":
-                try:
-                    nuevo_stock = int(input("Nuevo stock: ").strip())
-                    producto["stock"] = nuevo_stock
-                    print(f"Stock actualizado a: {nuevo_stock}")
-                except ValueError:
-                    print("Error: stock inválido.")
-
-            elif opcion == "4":
-                print("Operación cancelada.")
-
-            else:
-                print("Opción no válida.")
+    producto = inventario.get(pid)
+    if producto is None:
+        print("Producto no encontrado ")
+        return decidir_continuar("volver a editar producto")
+
+    # Mostrar producto actual en formato tabla
+    sys.stdout.write("\n".join([
+        "",
+        "Producto actual:",
+        SEPARADOR,
+        ENCABEZADO_PRODUCTO,
+        SEPARADOR,
+        formatear_fila(producto),
+        SEPARADOR,
+    ]) + "\n")
+
+    # Submenú de edición
+    print("\n¿Qué dato deseas editar?")
+    print("1. Nombre")
+    print("2. Precio")
+    print("3. Stock")
+    print("4. Cancelar")
+
+    opcion = input("Selecciona una opción (1-4): ").strip()
+
+    if opcion == "1":
+        nuevo_nombre = input("Nuevo nombre: ").strip()
+        desindexar_producto(producto)
+        producto["nombre"] = nuevo_nombre
+        indexar_producto(producto)
+        print(f"Nombre actualizado a: {nuevo_nombre}")
+
+    elif opcion == "2":
+        try:
+            nuevo_precio = convertir_precio_ingresado(input("Nuevo precio: "))
+            producto["precio_centavos"] = nuevo_precio
+            print(f"Precio actualizado a: {formatear_precio(nuevo_precio)}")
+        except ValueError:
+            print("Error: precio inválido.")
+
+    elif opcion == "3":
+        try:
+            nuevo_stock = int(input("Nuevo stock: ").strip())
+            producto["stock"] = nuevo_stock
+            print(f"Stock actualizado a: {nuevo_stock}")
+        except ValueError:
+            print("Error: stock inválido.")
+
+    elif opcion == "4":
+        print("Operación cancelada.")
 
-            # Guardar los cambios después de la edición
-            if guardar_inventario(inventario):
-                print("Producto actualizado y guardado correctamente ")
-            else:
-                print("Error al guardar los cambios")
-            return decidir_continuar("volver a editar producto")
+    else:
+        print("Opción no válida.")
 
-    print("Producto no encontrado ")
-    time.sleep(1)
+    # Guardar los cambios después de la edición
+    if registrar_cambio(inventario, "EDIT", producto):
+        print("Producto actualizado y guardado correctamente ")
+    else:
+        print("Error al guardar los cambios")
     return decidir_continuar("volver a editar producto")
 
 def registrar_venta(inventario):
     print("\n--- Registrar venta ---")
     codigo = input("Ingrese código: ").strip()
 
-    for producto in inventario:
-        if producto["codigo"] == codigo:
-            print(f"Producto: {producto['nombre']} | Stock actual: {producto['stock']}")
+    producto = inventario.get(codigo)
+    if producto is None:
+        print("Producto no encontrado")
+        return decidir_continuar("registrar otra venta")
 
-            try:
-                cantidad = int(input("Cantidad vendida: ").strip())
-            except ValueError:
-                print("Cantidad inválida.")
-                time.sleep(1)
-                return
-
-            if cantidad <= 0:
-                print("La cantidad debe ser mayor a 0.")
-                time.sleep(1)
-                return
-
-            if cantidad > producto["stock"]:
-                print("No hay stock suficiente.")
-                time.sleep(1)
-                return
-
-            producto["stock"] -= cantidad
-            producto["vendidos"] = producto.get("vendidos", 0) + cantidad
-
-            if guardar_inventario(inventario):
-                print("Venta registrada ")
-                time.sleep(1)
-            else:
-                print("Error al guardar ")
-                time.sleep(1)
+    print(f"Producto: {producto['nombre']} | Stock actual: {producto['stock']}")
 
-            return
+    try:
+        cantidad = int(input("Cantidad vendida: ").strip())
+    except ValueError:
+        print("Cantidad inválida.")
+        return decidir_continuar("registrar otra venta")
+
+    if cantidad <= 0:
+        print("La cantidad debe ser mayor a 0.")
+        return decidir_continuar("registrar otra venta")
+
+    if cantidad > producto["stock"]:
+        print("No hay stock suficiente.")
+        return decidir_continuar("registrar otra venta")
+
+    producto["stock"] -= cantidad
+    producto["vendidos"] += cantidad
+
+    if registrar_cambio(inventario, "EDIT", producto):
+        print("Venta registrada ")
+    else:
+        print("Error al guardar ")
+    return decidir_continuar("registrar otra venta")
 
-    print("Producto no encontrado")
-    
 # ------------------------------
 # REPORTE 
 # ------------------------------
 
+def resumir_columnas(precios, stocks, unidades_vendidas, umbral):
+    """
+    Calcula los números del reporte a partir de las columnas del inventario.
+    Retorna (unidades en stock, valor del inventario, unidades vendidas,
+    valor vendido, posiciones con stock <= umbral, posiciones del top 3).
+    Los valores en dinero van en centavos.
+    """
+    # Totales con sum y map (corren en C)
+    total_unidades_stock = sum(stocks)
+    valor_total_inventario = sum(map(operator.mul, stocks, precios))
+    total_unidades_vendidas = sum(unidades_vendidas)
+    valor_total_vendido = sum(map(operator.mul, unidades_vendidas, precios))
+
+    # Stock bajo y top 3 en un solo recorrido (guardando posiciones). Para el
+    # top se mantiene un heap de 3 elementos en vez de ordenar todo el
+    # inventario. La clave (vendidos, -posición) deja primero, en caso de
+    # empate, al producto que aparece antes (igual que sorted).
+    stock_bajo = []
+    top_heap = []
+    heappush = heapq.heappush
+    heappushpop = heapq.heappushpop
+
+    for i, (stock, vendidos) in enumerate(zip(stocks, unidades_vendidas)):
+        if stock <= umbral:
+            stock_bajo.append(i)
+
+        item = (vendidos, -i)
+        if len(top_heap) < 3:
+            heappush(top_heap, item)
+        else:
+            heappushpop(top_heap, item)
+
+    top = [-menos_i for _, menos_i in sorted(top_heap, reverse=True)]
+
+    return (
+        total_unidades_stock,
+        valor_total_inventario,
+        total_unidades_vendidas,
+        valor_total_vendido,
+        stock_bajo,
+        top,
+    )
+
+def resumir_columnas_numpy(precios, stocks, unidades_vendidas, umbral):
+    """
+    Igual que resumir_columnas, pero con numpy (para inventarios grandes).
+    np.frombuffer usa directamente la memoria de los arreglos, sin copiarlos.
+    numpy no avisa si una suma se pasa de 64 bits: si los valores son tan
+    grandes que podría pasar, se calcula con resumir_columnas.
+    """
+    p = np.frombuffer(precios, dtype=np.int64)
+    s = np.frombuffer(stocks, dtype=np.int64)
+    v = np.frombuffer(unidades_vendidas, dtype=np.int64)
+
+    maximo_precio = max(abs(int(p.min())), abs(int(p.max())))
+    maximo_cantidad = max(abs(int(s.min())), abs(int(s.max())), abs(int(v.min())), abs(int(v.max())))
+    # max(..., 1): con precios en 0 las sumas de unidades igual pueden pasarse
+    if max(maximo_precio, 1) * maximo_cantidad * len(p) >= 2 ** 63:
+        return resumir_columnas(precios, stocks, unidades_vendidas, umbral)
+
+    # Orden estable: en caso de empate queda primero el que aparece antes
+    top = np.argsort(-v, kind="stable")[:3]
+
+    return (
+        int(s.sum()),
+        int(np.dot(s, p)),
+        int(v.sum()),
+        int(np.dot(v, p)),
+        np.flatnonzero(s <= umbral).tolist(),
+        top.tolist(),
+    )
+
 def generar_reporte(inventario):
     print("\n=== REPORTE DE INVENTARIO ===")
 
@@ -455,63 +1020,81 @@ def generar_reporte(inventario):
         print("No hay productos registrados.")
         return
 
-    total_productos = len(inventario)
-    total_unidades_stock = 0
-    valor_total_inventario = 0
-    total_unidades_vendidas = 0
-    valor_total_vendido = 0
-
-    for p in inventario:
-        total_unidades_stock += p["stock"]
-        valor_total_inventario += p["stock"] * p["precio"]
-
-        vendidos = p.get("vendidos", 0)
-        total_unidades_vendidas += vendidos
-        valor_total_vendido += vendidos * p["precio"]
-
-    # Resumen general
-    print("\n--- Resumen General ---")
-    print(f"Total de productos distintos : {total_productos}")
-    print(f"Total de unidades en stock   : {total_unidades_stock}")
-    print(f"Valor total del inventario   : ${valor_total_inventario:.2f}")
-    print(f"Total de unidades vendidas   : {total_unidades_vendidas}")
-    print(f"Valor total vendido          : ${valor_total_vendido:.2f}")
+    # Todo el reporte trabaja sobre las columnas y las tablas se arman por
+    # posición, sin tocar el diccionario de cada producto
+    columnas = columnas_inventario(inventario)
+    codigos = columnas["codigos"]
+    nombres = columnas["nombres"]
+    precios = columnas["precios"]
+    stocks = columnas["stocks"]
+    unidades_vendidas = columnas["vendidos"]
 
-    # Productos con stock bajo
     umbral = 5
-    print(f"\n--- Productos con stock bajo (<= {umbral}) ---")
-    stock_bajo = [p for p in inventario if p["stock"] <= umbral]
+    total_productos = len(inventario)
+
+    # numpy solo sirve si las tres columnas quedaron como arreglos de 64 bits
+    if (
+        np is not None
+        and total_productos > MINIMO_PARA_NUMPY
+        and all(isinstance(c, array) for c in (precios, stocks, unidades_vendidas))
+    ):
+        resumir = resumir_columnas_numpy
+    else:
+        resumir = resumir_columnas
+
+    (
+        total_unidades_stock,
+        valor_total_inventario,
+        total_unidades_vendidas,
+        valor_total_vendido,
+        stock_bajo,
+        top,
+    ) = resumir(precios, stocks, unidades_vendidas, umbral)
+
+    # Armamos todo el reporte y lo escribimos de una sola vez
+    lineas = [
+        "",
+        "--- Resumen General ---",
+        f"Total de productos distintos : {total_productos}",
+        f"Total de unidades en stock   : {total_unidades_stock}",
+        f"Valor total del inventario   : ${formatear_precio(valor_total_inventario)}",
+        f"Total de unidades vendidas   : {total_unidades_vendidas}",
+        f"Valor total vendido          : ${formatear_precio(valor_total_vendido)}",
+        "",
+        f"--- Productos con stock bajo (<= {umbral}) ---",
+    ]
 
+    # Productos con stock bajo
     if len(stock_bajo) == 0:
-        print("No hay productos con stock bajo.")
+        lineas.append("No hay productos con stock bajo.")
     else:
-        print("-" * 60)
-        print(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'STOCK':<10}")
-        print("-" * 60)
-        for p in stock_bajo:
-            print(f"{p['codigo']:<10} {p['nombre']:<20} {p['stock']:<10}")
-        print("-" * 60)
+        lineas.append(SEPARADOR)
+        lineas.append(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'STOCK':<10}")
+        lineas.append(SEPARADOR)
+        for i in stock_bajo:
+            lineas.append(f"{codigos[i]:<10} {nombres[i]:<20} {stocks[i]:<10}")
+        lineas.append(SEPARADOR)
 
     # Top productos más vendidos
-    print("\n--- Top 3 productos más vendidos ---")
-    top = sorted(inventario, key=lambda x: x.get("vendidos", 0), reverse=True)[:3]
-
-    print("-" * 80)
-    print(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'VENDIDOS':<10} {'TOTAL VENDIDO ($)':<20}")
-    print("-" * 80)
-
-    for p in top:
-        vendidos = p.get("vendidos", 0)
-        total_vendido = vendidos * p.get("precio", 0)
-
-        print(
-            f"{p['codigo']:<10} "
-            f"{p['nombre']:<20} "
+    lineas.append("")
+    lineas.append("--- Top 3 productos más vendidos ---")
+    lineas.append(SEPARADOR_ANCHO)
+    lineas.append(f"{'CÓDIGO':<10} {'NOMBRE':<20} {'VENDIDOS':<10} {'TOTAL VENDIDO ($)':<20}")
+    lineas.append(SEPARADOR_ANCHO)
+
+    for i in top:
+        vendidos = unidades_vendidas[i]
+        total_vendido = vendidos * precios[i]
+
+        lineas.append(
+            f"{codigos[i]:<10} "
+            f"{nombres[i]:<20} "
             f"{vendidos:<10} "
-            f"{total_vendido:<20.2f}"
+            f"{formatear_precio(total_vendido):<20}"
         )
 
-    print("-" * 80)
+    lineas.append(SEPARADOR_ANCHO)
+    sys.stdout.write("\n".join(lineas) + "\n")
 
     return decidir_continuar("volver a generar reporte")
 
@@ -526,10 +1109,22 @@ def limpiar():
 # Volver al menu o repetir
 # ------------------------------
 def decidir_continuar(mensaje_repetir="Repetir esta acción"):
-    print("\n" + "-" * 60)
-    print("Presiona [Enter] para volver al menú")
-    print(f"Escribe [Espacio] y [Enter] para {mensaje_repetir}")
+    sys.stdout.write(f"{AVISO_VOLVER}Escribe [Espacio] y [Enter] para {mensaje_repetir}\n")
     return input("> ") == " "
 
+# ------------------------------
+# OPCIONES DEL MENÚ
+# ------------------------------
+OPCIONES_MENU = {
+    '1': mostrar_inventario,
+    '2': buscar_producto,
+    '3': agregar_producto,
+    '4': editar_producto,
+    '5': eliminar_producto,
+    '6': registrar_venta,
+    '7': generar_reporte,
+}
+
 # Ejecutar programa
-main()
+if __name__ == "__main__":
+    main()